@@ -0,0 +1,183 @@
+"""Offscreen timing harness for the pattern browser.
+
+Generates a synthetic pattern library, drives FileBrowser without a display
+and reports time to first paint, time per filter keystroke and time per
+folder switch. Pass --profile to also dump a per-function breakdown.
+
+    python benchmark_browser.py --width 200 --depth 2
+    python benchmark_browser.py --width 50 --depth 3 --profile browser.prof
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import cProfile
+import pstats
+import statistics
+
+# Must be set before QApplication is created
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, QEvent
+
+from patternbrowser_v1 import FileBrowser
+
+
+class FirstPaintWatcher(QObject):
+    def __init__(self):
+        super().__init__()
+        self.painted_at = None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self.painted_at is None:
+            self.painted_at = time.perf_counter()
+        return False
+
+
+def generate_pattern_tree(root, width, depth, lines):
+    """Create width**1 + ... + width**depth folders, each holding a system.md."""
+    body = "\n".join(f"- Step {i}: do the thing described here." for i in range(lines))
+    count = 0
+    level = [root]
+    for d in range(depth):
+        next_level = []
+        for parent in level:
+            for w in range(width):
+                folder = os.path.join(parent, f"pattern_{d}_{w}")
+                os.makedirs(folder)
+                with open(os.path.join(folder, "system.md"), "w", encoding="utf-8") as f:
+                    f.write(f"# IDENTITY and PURPOSE\n\n{body}\n")
+                next_level.append(folder)
+                count += 1
+        level = next_level
+    return count
+
+
+def summarize(samples):
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "count": len(samples),
+        "min_ms": ordered[0] * 1000,
+        "median_ms": statistics.median(ordered) * 1000,
+        "p95_ms": p95 * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "total_ms": sum(ordered) * 1000,
+    }
+
+
+def run_benchmark(app, root, query, switches):
+    results = {}
+
+    # Time to first paint: construct, populate and show until the tree paints
+    start = time.perf_counter()
+    browser = FileBrowser()
+    watcher = FirstPaintWatcher()
+    browser.folder_view.viewport().installEventFilter(watcher)
+    populate_start = time.perf_counter()
+    browser.populate_folder_structure(root)
+    results["populate_ms"] = (time.perf_counter() - populate_start) * 1000
+    browser.show()
+    deadline = time.perf_counter() + 30
+    while watcher.painted_at is None and time.perf_counter() < deadline:
+        app.processEvents()
+    painted_at = watcher.painted_at or time.perf_counter()
+    results["first_paint_ms"] = (painted_at - start) * 1000
+
+    # Filter: type the query one character at a time, then clear it again
+    keystrokes = []
+    for i in range(1, len(query) + 1):
+        t0 = time.perf_counter()
+        browser.search_input.setText(query[:i])
+        app.processEvents()
+        keystrokes.append(time.perf_counter() - t0)
+    for i in range(len(query) - 1, -1, -1):
+        t0 = time.perf_counter()
+        browser.search_input.setText(query[:i])
+        app.processEvents()
+        keystrokes.append(time.perf_counter() - t0)
+    results["filter_keystroke"] = summarize(keystrokes)
+
+    # Folder switch: walk the top-level patterns through the selection model
+    root_index = browser.proxy_model.index(0, 0)
+    rows = browser.proxy_model.rowCount(root_index)
+    folder_switches = []
+    for i in range(min(switches, rows)):
+        index = browser.proxy_model.index(i, 0, root_index)
+        t0 = time.perf_counter()
+        browser.folder_view.setCurrentIndex(index)
+        app.processEvents()
+        folder_switches.append(time.perf_counter() - t0)
+    results["folder_switch"] = summarize(folder_switches)
+
+    browser.close()
+    return results
+
+
+def print_results(results):
+    print(f"folders:          {results['folders']}")
+    print(f"populate:         {results['populate_ms']:.1f} ms")
+    print(f"first paint:      {results['first_paint_ms']:.1f} ms")
+    for key in ("filter_keystroke", "folder_switch"):
+        stats = results[key]
+        if not stats["count"]:
+            print(f"{key + ':':<18}no samples")
+            continue
+        print(f"{key + ':':<18}n={stats['count']} median={stats['median_ms']:.2f} ms "
+              f"p95={stats['p95_ms']:.2f} ms max={stats['max_ms']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Fabric Pattern Browser offscreen.")
+    parser.add_argument("--width", type=int, default=100, help="sub-folders per folder")
+    parser.add_argument("--depth", type=int, default=2, help="levels of nesting")
+    parser.add_argument("--lines", type=int, default=40, help="lines per system.md")
+    parser.add_argument("--query", default="pattern_1_9", help="text typed into the search box")
+    parser.add_argument("--switches", type=int, default=50, help="folder switches to time")
+    parser.add_argument("--profile", metavar="FILE", help="write cProfile stats to FILE and print the top entries")
+    parser.add_argument("--json", metavar="FILE", help="write the results as JSON to FILE")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="patternbrowser_bench_")
+    old_cwd = os.getcwd()
+    try:
+        root = os.path.join(workdir, "patterns")
+        os.makedirs(root)
+        folders = generate_pattern_tree(root, args.width, args.depth, args.lines)
+
+        # FileBrowser reads and writes its settings in the working directory;
+        # run from the scratch dir so the user's settings are left alone.
+        os.chdir(workdir)
+        app = QApplication.instance() or QApplication(sys.argv)
+
+        profiler = cProfile.Profile() if args.profile else None
+        if profiler:
+            profiler.enable()
+        results = run_benchmark(app, root, args.query, args.switches)
+        if profiler:
+            profiler.disable()
+        results["folders"] = folders
+    finally:
+        os.chdir(old_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_results(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+    if profiler:
+        profiler.dump_stats(args.profile)
+        print()
+        pstats.Stats(args.profile).sort_stats("cumulative").print_stats(25)
+
+
+if __name__ == "__main__":
+    main()
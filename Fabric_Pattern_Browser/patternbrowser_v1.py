@@ -25,23 +25,25 @@ class FolderFilterProxyModel(QSortFilterProxyModel):
 
         return self.filterRegExp().indexIn(item.text()) != -1
 
+# Resolved once at import; convert_path runs for every folder in the tree.
+PLATFORM = platform.system()
+
 def convert_path(path):
-    if platform.system() == "Windows":
+    if PLATFORM == "Windows":
         if path.startswith("//wsl$/"):
             # Convert WSL path to Windows path
             parts = path.split('/')
             drive = parts[3].lower()
-            windows_path = f"{drive}:\{'/'.join(parts[4:])}"
-            return windows_path.replace('/', '\\')
+            return f"{drive}:\\" + "\\".join(parts[4:])
         elif path.startswith("/mnt/"):
             # Convert WSL path to Windows path
             drive = path[5].upper()
-            return f"{drive}:{path[6:].replace('/', '\\')}"
-    elif platform.system() == "Linux":
+            return f"{drive}:" + path[6:].replace('/', '\\')
+    elif PLATFORM == "Linux":
         if ':' in path:
             # Convert Windows path to WSL path
             drive = path[0].lower()
-            return f"/mnt/{drive}{path[2:].replace('\\', '/')}"
+            return f"/mnt/{drive}" + path[2:].replace('\\', '/')
     return path
 
 class FileBrowser(QWidget):
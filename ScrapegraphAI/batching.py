@@ -0,0 +1,106 @@
+import json
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError
+from typing import List, Optional, NamedTuple
+from config import BATCH_TOKEN_BUDGET, BATCH_MAX_PAGES, BATCH_LINGER
+from llm import complete_json
+from reduce import count_tokens
+from urls import normalize_url
+
+SYSTEM_PROMPT = (
+    "You extract information from web pages. You are given several pages, each "
+    "introduced by its URL. Answer the user's request separately for every page, "
+    "using only that page's content. Reply with a single JSON object whose keys are "
+    "the page URLs exactly as given and whose values are JSON objects holding the "
+    "information extracted from that page."
+)
+# Rough allowance for the instructions and per-page framing in a batched request
+OVERHEAD_TOKENS = 200
+PAGE_OVERHEAD_TOKENS = 20
+
+class _Entry(NamedTuple):
+    url: str
+    text: str
+    tokens: int
+    future: Future
+
+class ExtractionBatcher:
+    """Packs small pages that share a prompt into one LLM request.
+
+    Worker threads call extract() and block until their page's batch has
+    run. A batch is sent once the next page would push it over the token
+    budget or page limit, or once its oldest page has waited `linger`
+    seconds; whichever worker notices runs the request itself. extract()
+    returns None when the reply has no usable result for the page, and the
+    caller then falls back to a single-page extraction.
+    """
+
+    def __init__(self, token_budget: int = BATCH_TOKEN_BUDGET, max_pages: int = BATCH_MAX_PAGES,
+                 linger: float = BATCH_LINGER):
+        self.token_budget = token_budget
+        self.max_pages = max_pages
+        self.linger = linger
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def extract(self, url: str, text: str, prompt: str) -> Optional[dict]:
+        entry = _Entry(url, text, count_tokens(text) + PAGE_OVERHEAD_TOKENS, Future())
+        full = None
+        with self._lock:
+            batch = self._pending.setdefault(prompt, [])
+            used = OVERHEAD_TOKENS + count_tokens(prompt) + sum(e.tokens for e in batch)
+            if batch and (used + entry.tokens > self.token_budget or len(batch) >= self.max_pages):
+                full = self._pending.pop(prompt)
+                batch = self._pending[prompt] = []
+            batch.append(entry)
+        if full:
+            self._run(full, prompt)
+
+        try:
+            return entry.future.result(timeout=self.linger)
+        except TimeoutError:
+            pass
+        # Nobody filled the batch in time; send it as it is
+        with self._lock:
+            batch = self._pending.get(prompt)
+            stale = self._pending.pop(prompt) if batch and any(e is entry for e in batch) else None
+        if stale:
+            self._run(stale, prompt)
+        return entry.future.result()
+
+    def _run(self, batch: List[_Entry], prompt: str):
+        if len(batch) == 1:
+            # Nothing to share the request with; a single-page call is better
+            batch[0].future.set_result(None)
+            return
+
+        pages = "\n\n".join(f"URL: {e.url}\nCONTENT:\n{e.text}" for e in batch)
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Request: {prompt}\n\n{pages}"},
+        ]
+        try:
+            reply = complete_json(messages)
+        except Exception as e:
+            logging.error(f"Batched extraction of {len(batch)} pages failed: {str(e)}")
+            reply = {}
+        if not isinstance(reply, dict):
+            reply = {}
+        by_url = {normalize_url(key): value for key, value in reply.items()}
+
+        missing = 0
+        for e in batch:
+            value = reply.get(e.url, by_url.get(normalize_url(e.url)))
+            if isinstance(value, str):
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    value = None
+            if isinstance(value, dict) and value:
+                e.future.set_result(value)
+            else:
+                missing += 1
+                e.future.set_result(None)
+        logging.info(f"Batched extraction of {len(batch)} pages in one request "
+                     f"({missing} falling back to single-page calls)")
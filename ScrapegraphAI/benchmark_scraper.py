@@ -0,0 +1,268 @@
+"""Offline end-to-end benchmark for scrape_company_info.
+
+Starts a local stand-in website and a stub OpenAI-compatible LLM endpoint,
+scrapes the site through the normal pipeline and reports throughput plus
+per-stage timings and token counts. No network access or API key is
+needed, so runs are reproducible and comparable between changes.
+
+    python benchmark_scraper.py --urls 200 --concurrency 16
+    python benchmark_scraper.py --urls 200 --batch-pages --llm-latency 1.0
+    python benchmark_scraper.py --urls 200 --duplicates 0.3
+    python benchmark_scraper.py --urls 50 --stream --llm-latency 2.0
+    python benchmark_scraper.py --throttle-rate 0.2 --metrics bench.jsonl --prometheus bench.prom
+"""
+import os
+import re
+import sys
+import json
+import time
+import logging
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Project modules are imported in main(), once the stub LLM endpoint is up,
+# because config reads the endpoint from the environment at import time
+os.environ["OPENAI_API_KEY"] = "benchmark"
+
+BOILERPLATE = """
+<header><nav><a href="/">Home</a><a href="/about">About</a><a href="/careers">Careers</a></nav></header>
+<div class="cookie-banner">We use cookies to improve your experience. <button>Accept</button></div>
+<aside class="sidebar"><h3>Latest news</h3><ul>{news}</ul></aside>
+<footer><p>&copy; 2024 Example Holdings. All rights reserved.</p><ul>{links}</ul></footer>
+<script>window.analytics = {{"id": "UA-000000", "events": []}};</script>
+"""
+
+def make_page(i: int, paragraphs: int) -> bytes:
+    news = "".join(f"<li>Press release number {n} about quarterly results</li>" for n in range(20))
+    links = "".join(f"<li><a href='/legal/{n}'>Legal notice {n}</a></li>" for n in range(20))
+    body = "".join(
+        f"<p>Company {i} has worked on many things over the years, paragraph {n} of its history.</p>"
+        for n in range(paragraphs)
+    )
+    return (
+        f"<html><head><title>Company {i}</title></head><body>"
+        f"{BOILERPLATE.format(news=news, links=links)}"
+        f"<main><h1>Project Atlas {i}</h1>"
+        f"<p>Project name: Atlas {i}. Purpose: mapping supply chains for company {i}.</p>"
+        f"{body}</main></body></html>"
+    ).encode("utf-8")
+
+class SiteHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    paragraphs = 40
+
+    def do_GET(self):
+        match = re.fullmatch(r"/company/(\d+)/?", self.path.split("?")[0])
+        if not match:
+            self.send_error(404)
+            return
+        time.sleep(self.latency)
+        page = make_page(int(match.group(1)), self.paragraphs)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+    def log_message(self, format, *args):
+        pass
+
+class LLMHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI chat completions endpoint returning canned extractions.
+
+    Streamed requests are answered with server-sent events, the reply spread
+    evenly over the latency.
+    """
+    latency = 0.0
+    throttle_rate = 0.0
+    requests = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        with LLMHandler.lock:
+            LLMHandler.requests += 1
+        if random.random() < self.throttle_rate:
+            body = json.dumps({"error": {"message": "Rate limit reached", "type": "rate_limit_error"}}).encode()
+            self.send_response(429)
+            self.send_header("Retry-After", "0.2")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        messages = request.get("messages", [])
+        text = "\n".join(str(m.get("content", "")) for m in messages)
+        urls = re.findall(r"^URL: (\S+)$", text, re.MULTILINE)
+        if urls:
+            answer = {url: self.extract(url) for url in urls}
+        else:
+            answer = self.extract(text)
+        content = json.dumps(answer)
+        usage = {"prompt_tokens": len(text) // 4, "completion_tokens": len(content) // 4,
+                 "total_tokens": (len(text) + len(content)) // 4}
+        if request.get("stream"):
+            self.stream(request, content, usage)
+            return
+
+        time.sleep(self.latency)
+        body = json.dumps({
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": usage,
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream(self, request: dict, content: str, usage: dict):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        pieces = [content[i:i + 8] for i in range(0, len(content), 8)]
+
+        def event(choices: list, **extra):
+            chunk = {"id": "chatcmpl-benchmark", "object": "chat.completion.chunk",
+                     "created": int(time.time()), "model": request.get("model", "stub"),
+                     "choices": choices, **extra}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        for piece in pieces:
+            time.sleep(self.latency / len(pieces))
+            event([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+        event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if (request.get("stream_options") or {}).get("include_usage"):
+            event([], usage=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    @staticmethod
+    def extract(text: str) -> dict:
+        match = re.search(r"Atlas (\d+)", text) or re.search(r"/company/(\d+)", text)
+        number = match.group(1) if match else "?"
+        return {"project_name": f"Atlas {number}", "purpose": f"mapping supply chains for company {number}"}
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(handler) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the scraping pipeline against local stubs.")
+    parser.add_argument("--urls", type=int, default=100, help="number of pages to scrape")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--paragraphs", type=int, default=40, help="filler paragraphs per page")
+    parser.add_argument("--site-latency", type=float, default=0.05, help="seconds per page load")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per LLM request")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of LLM requests answered with 429")
+    parser.add_argument("--batch-pages", action="store_true", help="pack small pages into shared LLM requests")
+    parser.add_argument("--duplicates", type=float, default=0.0,
+                        help="fraction of URLs that are aliases of another URL in the batch")
+    parser.add_argument("--no-dedupe", action="store_true", help="extract duplicates again")
+    parser.add_argument("--stream", action="store_true", help="stream extraction replies")
+    parser.add_argument("--fetch-mode", choices=["browser", "http"], default="http")
+    parser.add_argument("--metrics", help="write per-URL metrics to this JSONL file")
+    parser.add_argument("--prometheus", help="write aggregate metrics to this Prometheus text file")
+    parser.add_argument("--json", help="write the summary as JSON to this file")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+
+    SiteHandler.latency = args.site_latency
+    SiteHandler.paragraphs = args.paragraphs
+    LLMHandler.latency = args.llm_latency
+    LLMHandler.throttle_rate = args.throttle_rate
+    site = start_server(SiteHandler)
+    llm_server = start_server(LLMHandler)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{llm_server.server_address[1]}/v1"
+
+    import llm
+    from scraper import scrape_company_info
+    from scheduler import ScrapeScheduler
+    from fetcher import Fetcher
+    from batching import ExtractionBatcher
+    from dedupe import DedupeIndex
+    from metrics import MetricsRecorder
+    logging.getLogger().setLevel(logging.WARNING)
+
+    # The stubs are the system under test's only neighbours; don't let the
+    # production politeness limits hide the pipeline's own throughput
+    unlimited = 1_000_000
+    llm.set_rate_limit(unlimited, unlimited)
+    fetcher = Fetcher(mode=args.fetch_mode, pool_size=args.concurrency,
+                      host_rate=unlimited, host_burst=unlimited)
+    batcher = ExtractionBatcher() if args.batch_pages else None
+    dedupe = None if args.no_dedupe else DedupeIndex()
+    metrics = MetricsRecorder(args.metrics)
+    prompt = "extract Project Name and Purpose"
+    base = f"http://127.0.0.1:{site.server_address[1]}/company"
+    urls = []
+    for i in range(args.urls):
+        if i and random.random() < args.duplicates:
+            # Aliases come as tracking-parameter variants of an earlier URL
+            urls.append(f"{base}/{random.randrange(i)}/?utm_source=bench&utm_campaign=alias{i}")
+        else:
+            urls.append(f"{base}/{i}")
+
+    scheduler = ScrapeScheduler(
+        lambda url: scrape_company_info(url, prompt, fetcher=fetcher, batcher=batcher,
+                                        metrics=metrics, dedupe=dedupe,
+                                        on_partial=(lambda url, fields: None) if args.stream else None),
+        max_concurrency=args.concurrency,
+        max_per_host=args.concurrency
+    )
+    start = time.perf_counter()
+    try:
+        scheduler.run(urls, lambda url, result: None)
+    finally:
+        fetcher.close()
+        site.shutdown()
+        llm_server.shutdown()
+    elapsed = time.perf_counter() - start
+
+    summary = metrics.summary()
+    summary["elapsed_seconds"] = elapsed
+    summary["urls_per_second"] = args.urls / elapsed if elapsed else 0.0
+    summary["llm_requests"] = LLMHandler.requests
+
+    print(f"URLs:             {args.urls} ({summary['urls']['done']} done, {summary['urls']['failed']} failed)")
+    print(f"Elapsed:          {elapsed:.2f} s")
+    print(f"Throughput:       {summary['urls_per_second']:.2f} URLs/s")
+    print(f"LLM requests:     {summary['llm_requests']}")
+    print(f"Mean fetch:       {summary['mean_fetch_seconds'] * 1000:.1f} ms")
+    print(f"Mean LLM:         {summary['mean_llm_seconds'] * 1000:.1f} ms")
+    print(f"Mean per URL:     {summary['mean_total_seconds'] * 1000:.1f} ms")
+    if args.stream:
+        print(f"Mean first field: {summary['mean_first_field_seconds'] * 1000:.1f} ms")
+    print(f"Tokens in / out:  {summary['tokens_in']:g} / {summary['tokens_out']:g} "
+          f"({summary['tokens_saved']:g} saved by reduction)")
+    print(f"Retries:          {summary['retries']:g}")
+    print(f"Duplicates:       {summary['duplicates']:g}")
+
+    if args.prometheus:
+        metrics.write_prometheus(args.prometheus)
+    metrics.close()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=4)
+    return 0 if not summary["urls"]["failed"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
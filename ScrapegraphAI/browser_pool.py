@@ -0,0 +1,127 @@
+import logging
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError
+from playwright.sync_api import sync_playwright
+from config import HEADLESS, USER_AGENT, BROWSER_POOL_SIZE, BROWSER_RECYCLE_AFTER, PAGE_TIMEOUT
+
+class BrowserPool:
+    """A fixed number of long-lived headless browsers shared by a whole batch.
+
+    Playwright's sync API only works on the thread that started it, so each
+    browser lives on its own thread and pages are handed to it through a
+    queue. A browser keeps one context (and with it cookies and open
+    connections) across pages, and is relaunched after recycle_after pages
+    or as soon as it stops responding. If a browser thread can't run at all
+    (Playwright fails to start), it fails every page handed to it instead.
+    """
+
+    # Slack on top of the page timeout for queueing and browser launches
+    FETCH_MARGIN = 30
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, recycle_after: int = BROWSER_RECYCLE_AFTER,
+                 headless: bool = HEADLESS, timeout: float = PAGE_TIMEOUT):
+        self.recycle_after = recycle_after
+        self.headless = headless
+        self.timeout_ms = int(timeout * 1000)
+        self._queue = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"browser-{i}", daemon=True)
+            for i in range(max(1, size))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def fetch(self, url: str):
+        """Load a page and return (status, headers, html)."""
+        future = Future()
+        self._queue.put((url, future))
+        try:
+            return future.result(timeout=self.timeout_ms / 1000 + self.FETCH_MARGIN)
+        except TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Browser pool timed out loading {url}")
+
+    def close(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _launch(self, playwright):
+        browser = playwright.chromium.launch(headless=self.headless)
+        context = browser.new_context(user_agent=USER_AGENT)
+        context.set_default_timeout(self.timeout_ms)
+        return browser, context
+
+    @staticmethod
+    def _shutdown(browser):
+        try:
+            browser.close()
+        except Exception:
+            pass
+
+    def _run(self):
+        stopped = threading.Event()
+        try:
+            self._serve(stopped)
+        except Exception as e:
+            logging.error(f"Browser thread failed: {str(e)}")
+            if stopped.is_set():
+                return
+            # Keep taking pages so callers fail fast instead of waiting forever
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                url, future = item
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+
+    def _serve(self, stopped: threading.Event):
+        with sync_playwright() as playwright:
+            browser, context, pages_served = None, None, 0
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    stopped.set()
+                    break
+                url, future = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                # Health check and recycling happen between pages
+                if browser is not None and (not browser.is_connected() or pages_served >= self.recycle_after):
+                    self._shutdown(browser)
+                    browser = None
+                if browser is None:
+                    try:
+                        browser, context = self._launch(playwright)
+                        pages_served = 0
+                    except Exception as e:
+                        logging.error(f"Failed to launch browser: {str(e)}")
+                        future.set_exception(e)
+                        continue
+
+                page = None
+                try:
+                    page = context.new_page()
+                    response = page.goto(url, wait_until="domcontentloaded")
+                    # goto() returns None for same-document navigations
+                    status = response.status if response is not None else 200
+                    headers = response.headers if response is not None else {}
+                    future.set_result((status, headers, page.content()))
+                except Exception as e:
+                    future.set_exception(e)
+                finally:
+                    pages_served += 1
+                    if page is not None:
+                        try:
+                            page.close()
+                        except Exception:
+                            # A page that can't be closed means the browser is unhealthy
+                            self._shutdown(browser)
+                            browser = None
+
+            if browser is not None:
+                self._shutdown(browser)
@@ -0,0 +1,109 @@
+import json
+import sqlite3
+import hashlib
+import threading
+import time
+from typing import Optional, Tuple
+from urls import normalize_url
+from config import CACHE_PATH, CACHE_TTL, CACHE_MAX_ENTRIES
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.strip().encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """On-disk cache of extraction results keyed by URL, prompt and model.
+
+    Results are also filed under the fingerprint of the page they came from
+    (see get_content), so an alias of an already processed page can reuse
+    its result.
+
+    Entries older than ttl seconds are treated as missing. Once the cache
+    holds more than max_entries rows the least recently used ones are evicted.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl: Optional[float] = CACHE_TTL,
+                 max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " result TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(url: str, prompt: str, model: str) -> str:
+        return f"{normalize_url(url)}|{prompt_hash(prompt)}|{model}"
+
+    @staticmethod
+    def make_content_key(page_hash: str, prompt: str, model: str) -> str:
+        return f"content:{page_hash}|{prompt_hash(prompt)}|{model}"
+
+    def get(self, url: str, prompt: str, model: str) -> Optional[dict]:
+        row = self._get(self.make_key(url, prompt, model))
+        return json.loads(row[1]) if row else None
+
+    def get_content(self, page_hash: str, prompt: str, model: str) -> Optional[Tuple[str, dict]]:
+        """(url, result) of a page with this content fingerprint, if one was extracted."""
+        row = self._get(self.make_content_key(page_hash, prompt, model))
+        return (row[0], json.loads(row[1])) if row else None
+
+    def put(self, url: str, prompt: str, model: str, result: dict):
+        self._put(self.make_key(url, prompt, model), url, result)
+
+    def put_content(self, page_hash: str, prompt: str, model: str, url: str, result: dict):
+        self._put(self.make_content_key(page_hash, prompt, model), url, result)
+
+    def _get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, result, created_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and now - row[2] > self.ttl:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return row
+
+    def _put(self, key: str, url: str, result: dict):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, url, result, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, url, json.dumps(result, ensure_ascii=False), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl,))
+        count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN"
+                " (SELECT key FROM results ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,129 @@
+"""Headless batch scraping for cron jobs and servers without a display.
+
+URLs are read one per line from a file or stdin and streamed through the
+scraper; each result is appended to a JSONL file as soon as it arrives.
+With --csv, a CSV is written in a final pass. With --stream, each URL's
+fields are also written as "partial" lines while they are generated. Results are never all held
+in memory, so batches of any size run in constant memory.
+
+    python cli.py urls.txt -o results.jsonl --csv results.csv
+    cat urls.txt | python cli.py - -o results.jsonl --prompt "extract company name"
+"""
+import sys
+import json
+import logging
+import signal
+import argparse
+import threading
+from scraper import scrape_company_info
+from scheduler import ScrapeScheduler
+from cache import ResultCache
+from page_store import PageStore
+from fetcher import Fetcher
+from batching import ExtractionBatcher
+from dedupe import DedupeIndex
+from export import CSVExporter
+from metrics import MetricsRecorder
+from config import MAX_CONCURRENCY, MAX_PER_HOST, FETCH_MODE, STREAM_RESULTS
+
+DEFAULT_PROMPT = "extract Project Name and Purpose"
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape a list of URLs without the GUI.")
+    parser.add_argument("urls", help="file with one URL per line, or - for stdin")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file to write results to")
+    parser.add_argument("--csv", help="also write a CSV of all results when the batch finishes")
+    parser.add_argument("--append", action="store_true", help="append to the output file instead of replacing it")
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT, help="extraction prompt")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY, help="URLs scraped at once")
+    parser.add_argument("--per-host", type=int, default=MAX_PER_HOST, help="URLs scraped at once per host")
+    parser.add_argument("--fetch-mode", choices=["browser", "http"], default=FETCH_MODE,
+                        help="render pages in a headless browser or download them directly")
+    parser.add_argument("--no-cache", action="store_true", help="ignore cached results and scrape again")
+    parser.add_argument("--refetch", action="store_true", help="download pages again instead of using the page store")
+    parser.add_argument("--batch-pages", action="store_true", help="pack small pages into shared LLM requests")
+    parser.add_argument("--no-dedupe", action="store_true",
+                        help="extract every URL even if it is an alias or mirror of another")
+    parser.add_argument("--stream", action="store_true", default=STREAM_RESULTS,
+                        help="stream extraction replies and write partial results as fields arrive")
+    parser.add_argument("--metrics", help="append per-URL timing and token metrics to this JSONL file")
+    parser.add_argument("--prometheus", help="write aggregate metrics in Prometheus text format to this file")
+    parser.add_argument("--progress-every", type=int, default=100, help="log progress every N URLs")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    source = sys.stdin if args.urls == "-" else open(args.urls, "r", encoding="utf-8")
+    output = open(args.output, "a" if args.append else "w", encoding="utf-8")
+    exporter = CSVExporter() if args.csv else None
+    cache = ResultCache()
+    store = PageStore()
+    fetcher = Fetcher(mode=args.fetch_mode, pool_size=args.concurrency)
+    batcher = ExtractionBatcher() if args.batch_pages else None
+    dedupe = None if args.no_dedupe else DedupeIndex()
+    metrics = MetricsRecorder(args.metrics)
+    counts = {"done": 0, "failed": 0}
+    output_lock = threading.Lock()
+
+    def write(record: dict):
+        # Called from on_partial on worker threads as well
+        with output_lock:
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+
+    def on_partial(url: str, fields: dict):
+        write({"url": url, "partial": fields})
+
+    def on_result(url: str, result: dict):
+        write({"url": url, "result": result})
+        if exporter is not None:
+            exporter.add(url, result)
+        counts["failed" if "error" in result else "done"] += 1
+        finished = counts["done"] + counts["failed"]
+        if finished % args.progress_every == 0:
+            logging.info(f"{finished} URLs finished ({counts['failed']} failed)")
+            if args.prometheus:
+                metrics.write_prometheus(args.prometheus)
+
+    scheduler = ScrapeScheduler(
+        lambda url: scrape_company_info(url, args.prompt, fetcher=fetcher, cache=cache,
+                                        refresh=args.no_cache, store=store, refetch=args.refetch,
+                                        batcher=batcher, metrics=metrics, dedupe=dedupe,
+                                        on_partial=on_partial if args.stream else None),
+        max_concurrency=args.concurrency,
+        max_per_host=args.per_host
+    )
+    def on_sigterm(signum, frame):
+        logging.warning("Terminated; finishing the URLs in progress")
+        scheduler.stop()
+
+    # Service managers stop jobs with SIGTERM; finish cleanly so the output
+    # and metrics files are complete
+    previous_handler = signal.signal(signal.SIGTERM, on_sigterm)
+    try:
+        scheduler.run(source, on_result)
+    except KeyboardInterrupt:
+        logging.warning("Interrupted; results so far are in the output file")
+        return 130
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+        fetcher.close()
+        output.close()
+        cache.close()
+        store.close()
+        if source is not sys.stdin:
+            source.close()
+        if exporter is not None:
+            exporter.write(args.csv)
+            exporter.close()
+        if args.prometheus:
+            metrics.write_prometheus(args.prometheus)
+        metrics.close()
+
+    logging.info(f"Scraping completed: {counts['done']} done, {counts['failed']} failed, "
+                 f"{metrics.summary()['duplicates']:g} duplicates")
+    return 1 if counts["failed"] and not counts["done"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,89 @@
 import os
+import copy
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+MODEL = "openai/gpt-4o-mini"
+# Optional OpenAI-compatible endpoint, e.g. a local stub for benchmarking
+LLM_BASE_URL = os.getenv("OPENAI_BASE_URL")
+
+# Result cache: entries expire after CACHE_TTL seconds (None keeps them forever)
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scrape_cache.sqlite")
+CACHE_TTL = 7 * 24 * 60 * 60
+CACHE_MAX_ENTRIES = 50000
+
+# Named scrape jobs, kept so interrupted batches can be resumed
+JOBS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs")
+
+# Per-URL metrics (JSONL) and Prometheus text files written for each GUI job
+METRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics")
+
+# Fetched pages are kept this long before they are downloaded again
+PAGE_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "page_store.sqlite")
+PAGE_TTL = 7 * 24 * 60 * 60
+
+# Page fetching: "browser" renders pages in a pool of headless browsers,
+# "http" downloads them directly (faster, but no JavaScript)
+FETCH_MODE = "browser"
+HEADLESS = True
+USER_AGENT = "CustomWebScraper v1.0"
+PAGE_TIMEOUT = 30
+# Browsers are relaunched after this many pages to keep memory in check
+BROWSER_RECYCLE_AFTER = 50
+
+# Pages are cut down to the chunks most relevant to the prompt, at most
+# TOKEN_BUDGET tokens per page, before they are sent to the LLM
+TOKEN_BUDGET = 4000
+CHUNK_TOKENS = 300
+
+# Multi-page extraction: pages reduced to at most BATCH_PAGE_MAX_TOKENS are
+# packed into shared LLM requests of up to BATCH_TOKEN_BUDGET tokens. A
+# partly filled batch is sent after waiting BATCH_LINGER seconds.
+BATCH_PAGE_MAX_TOKENS = 1500
+BATCH_TOKEN_BUDGET = 12000
+BATCH_MAX_PAGES = 20
+BATCH_LINGER = 1.0
+
+# Pages with less visible text than this (loading screens, "enable
+# JavaScript" notices) are never matched to other pages by content
+DEDUPE_MIN_CHARS = 200
+# Finished keys the in-batch duplicate index remembers for late aliases
+DEDUPE_MAX_ENTRIES = 10000
+
+# Stream extraction replies and show each URL's fields as they are generated.
+# Streamed pages are extracted with a direct LLM request instead of SmartScraperGraph.
+STREAM_RESULTS = False
+
+# Batch scheduling limits
+MAX_CONCURRENCY = 8
+MAX_PER_HOST = 2
+BROWSER_POOL_SIZE = MAX_CONCURRENCY
+
+# Rate limits in requests per second, per target host and per LLM provider.
+# Limits adapt downwards when the other side throttles us and recover slowly.
+HOST_RATE = 2.0
+HOST_BURST = 4
+LLM_RATES = {"openai": 8.0}
+LLM_RATE = 4.0
+LLM_BURST = 8
+
+# Transient failures are retried with jittered exponential backoff (or after
+# the server's Retry-After); a host is skipped for BREAKER_RESET seconds
+# after BREAKER_THRESHOLD failures in a row
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+BREAKER_THRESHOLD = 5
+BREAKER_RESET = 120.0
+# Idle per-host limiters beyond this many hosts are dropped
+LIMITER_MAX_KEYS = 10000
+
+# How often the GUI applies queued updates from the scraping threads
+UI_REFRESH_MS = 100
+
 def get_api_key():
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
@@ -11,12 +91,23 @@ def get_api_key():
     return api_key
 
 def create_scraper_config():
-    return {
+    # Built once; callers get their own copy so they can't alter the shared one
+    return copy.deepcopy(_scraper_config())
+
+@lru_cache(maxsize=None)
+def _scraper_config():
+    config = {
         "llm": {
             "api_key": get_api_key(),
-            "model": "openai/gpt-4o-mini",
+            "model": MODEL,
+            # Retries are left to llm.call_llm, which honours Retry-After and
+            # slows the provider's rate limiter when throttled
+            "max_retries": 0,
         },
         "verbose": True,
-        "headless": False,
-        "user_agent": "CustomWebScraper v1.0",
-    }
\ No newline at end of file
+        "headless": HEADLESS,
+        "user_agent": USER_AGENT,
+    }
+    if LLM_BASE_URL:
+        config["llm"]["base_url"] = LLM_BASE_URL
+    return config
\ No newline at end of file
@@ -0,0 +1,51 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Optional
+from config import DEDUPE_MAX_ENTRIES
+
+class DedupeIndex:
+    """Tracks which URL of a batch owns the extraction for a given key.
+
+    Keys are normalized URLs or page fingerprints. The first URL to claim a
+    key does the extraction; later URLs with the same key wait for it and
+    reuse its result instead of calling the LLM again. Only extractions in
+    flight and the last max_entries finished ones are kept, so memory stays
+    flat however large the batch.
+    """
+
+    def __init__(self, max_entries: int = DEDUPE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._finished: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def claim(self, key: str) -> Optional[Future]:
+        """None if the caller now owns key, else a future of the owner's (url, result)."""
+        with self._lock:
+            if key in self._finished:
+                self._finished.move_to_end(key)
+                future = Future()
+                future.set_result(self._finished[key])
+                return future
+            future = self._pending.get(key)
+            if future is None:
+                self._pending[key] = Future()
+            return future
+
+    def resolve(self, key: str, url: str, result: Optional[dict]):
+        """Publish the owner's result; a failed extraction releases the key instead."""
+        with self._lock:
+            future = self._pending.pop(key, None)
+            failed = result is None or "error" in result
+            if not failed:
+                self._finished[key] = (url, result)
+                self._finished.move_to_end(key)
+                while len(self._finished) > self.max_entries:
+                    self._finished.popitem(last=False)
+        if future is not None and not future.done():
+            future.set_result(None if failed else (url, result))
+
+def reuse(origin_url: str, result: dict) -> dict:
+    """Result of origin_url recorded as a duplicate of it, or of what it duplicated."""
+    return dict(result, duplicate_of=result.get("duplicate_of", origin_url))
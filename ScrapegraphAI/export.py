@@ -0,0 +1,49 @@
+import csv
+import json
+import os
+import tempfile
+from typing import Dict
+
+def flatten_dict(d: dict, parent_key: str = '', sep: str = '_') -> dict:
+    items = []
+    for k, v in d.items():
+        new_key = f"{parent_key}{sep}{k}" if parent_key else k
+        if isinstance(v, dict):
+            items.extend(flatten_dict(v, new_key, sep=sep).items())
+        else:
+            items.append((new_key, v))
+    return dict(items)
+
+class CSVExporter:
+    """Builds a CSV of results without holding them in memory.
+
+    Each result is flattened once as it is added and spooled to a temporary
+    JSONL file while the set of columns is collected; write() then streams
+    the spooled rows out under the final header. Memory use depends only on
+    the number of distinct columns.
+    """
+
+    def __init__(self):
+        self.columns: Dict[str, None] = {}
+        self._spool = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
+
+    def add(self, url: str, result: dict):
+        flat = flatten_dict(result) if isinstance(result, dict) else {"result": result}
+        for key in flat:
+            if key not in self.columns:
+                self.columns[key] = None
+        self._spool.write(json.dumps([url, flat], ensure_ascii=False, default=str) + '\n')
+
+    def write(self, file_path: str):
+        columns = list(self.columns)
+        self._spool.seek(0)
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['URL'] + columns)
+            for line in self._spool:
+                url, flat = json.loads(line)
+                writer.writerow([url] + [flat.get(key, 'N/A') for key in columns])
+        self._spool.seek(0, os.SEEK_END)
+
+    def close(self):
+        self._spool.close()
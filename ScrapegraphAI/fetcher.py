@@ -0,0 +1,80 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, Comment
+from config import FETCH_MODE, USER_AGENT, BROWSER_POOL_SIZE, PAGE_TIMEOUT, HOST_RATE, HOST_BURST
+from ratelimit import LimiterRegistry, call_with_limits
+from urls import get_host
+
+class FetchError(Exception):
+    def __init__(self, url: str, status: int, headers=None):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+        self.headers = headers or {}
+
+class Fetcher:
+    """Fetches pages for a whole batch over shared, kept-alive connections.
+
+    In "browser" mode pages are rendered by a BrowserPool; in "http" mode
+    they are downloaded with a pooled requests session, which is much
+    cheaper but does not run JavaScript. Requests to each host go through
+    that host's rate limiter and circuit breaker, and transient failures
+    are retried.
+    """
+
+    def __init__(self, mode: str = FETCH_MODE, pool_size: int = BROWSER_POOL_SIZE,
+                 timeout: float = PAGE_TIMEOUT, host_rate: float = HOST_RATE,
+                 host_burst: float = HOST_BURST):
+        if mode not in ("browser", "http"):
+            raise ValueError(f"Unknown fetch mode: {mode}")
+        self.mode = mode
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.browser_pool = None
+        self.limits = LimiterRegistry(host_rate, host_burst)
+        self._lock = threading.Lock()
+
+    def _get_browser_pool(self):
+        # Started on first use, so batches served from the page store never launch a browser
+        with self._lock:
+            if self.browser_pool is None:
+                # Imported here so "http" mode works without Playwright installed
+                from browser_pool import BrowserPool
+                self.browser_pool = BrowserPool(size=self.pool_size, timeout=self.timeout)
+            return self.browser_pool
+
+    def fetch(self, url: str) -> str:
+        if "://" not in url:
+            url = f"http://{url}"
+        host = get_host(url)
+        return call_with_limits(lambda: self._fetch_once(url), self.limits.bucket(host),
+                                self.limits.breaker(host), name=url)
+
+    def _fetch_once(self, url: str) -> str:
+        if self.mode == "browser":
+            status, headers, html = self._get_browser_pool().fetch(url)
+        else:
+            response = self.session.get(url, timeout=self.timeout)
+            status, headers, html = response.status_code, response.headers, response.text
+        if status >= 400:
+            raise FetchError(url, status, headers)
+        return html
+
+    def close(self):
+        if self.browser_pool is not None:
+            self.browser_pool.close()
+        self.session.close()
+
+def clean_html(html: str) -> str:
+    """Drop scripts, styles and comments, which never carry extractable content."""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript", "template", "svg", "iframe"]):
+        tag.decompose()
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+    return str(soup)
@@ -0,0 +1,139 @@
+import os
+import re
+import json
+import time
+import threading
+from typing import Dict, Iterable, List
+from config import JOBS_DIR
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+def job_path(name: str, jobs_dir: str = JOBS_DIR) -> str:
+    if not re.fullmatch(r"[A-Za-z0-9_.-]+", name) or name.startswith("."):
+        raise ValueError(f"Invalid job name: {name!r} (use letters, digits, '.', '_' and '-')")
+    return os.path.join(jobs_dir, f"{name}.jsonl")
+
+def list_jobs(jobs_dir: str = JOBS_DIR) -> List[str]:
+    if not os.path.isdir(jobs_dir):
+        return []
+    return sorted(f[:-len(".jsonl")] for f in os.listdir(jobs_dir) if f.endswith(".jsonl"))
+
+def result_status(result: dict) -> str:
+    return FAILED if isinstance(result, dict) and "error" in result else DONE
+
+class ScrapeJob:
+    """A named scrape job backed by an append-only JSONL file.
+
+    The file starts with a header holding the prompt, then lists every URL,
+    then records one line per finished URL. With streaming on, the fields of
+    a URL still being extracted are also recorded as "partial" lines, which
+    its final result supersedes. Loading replays the file, so a job survives
+    crashes and closed windows and can be resumed later. A partly written
+    last line (from a crash mid-write) is ignored.
+    """
+
+    def __init__(self, path: str, name: str, prompt: str):
+        self.path = path
+        self.name = name
+        self.prompt = prompt
+        self.statuses: Dict[str, str] = {}
+        self.results: Dict[str, dict] = {}
+        self.partials: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+    @classmethod
+    def create(cls, name: str, urls: Iterable[str], prompt: str, jobs_dir: str = JOBS_DIR) -> "ScrapeJob":
+        path = job_path(name, jobs_dir)
+        os.makedirs(jobs_dir, exist_ok=True)
+        job = cls(path, name, prompt)
+        job._file = open(path, "w", encoding="utf-8")
+        job._write({"type": "job", "name": name, "prompt": prompt, "created_at": time.time()})
+        for url in urls:
+            url = url.strip()
+            if url and url not in job.statuses:
+                job.statuses[url] = PENDING
+                job._write({"type": "url", "url": url})
+        job._sync()
+        return job
+
+    @classmethod
+    def load(cls, name: str, jobs_dir: str = JOBS_DIR) -> "ScrapeJob":
+        path = job_path(name, jobs_dir)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No job named {name!r} in {jobs_dir}")
+        job = None
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                kind = record.get("type")
+                if kind == "job":
+                    job = cls(path, record["name"], record["prompt"])
+                elif job is None:
+                    continue
+                elif kind == "url":
+                    job.statuses.setdefault(record["url"], PENDING)
+                elif kind == "partial":
+                    job.partials[record["url"]] = record["result"]
+                elif kind == "result":
+                    job.statuses[record["url"]] = record["status"]
+                    job.results[record["url"]] = record["result"]
+                    job.partials.pop(record["url"], None)
+        if job is None:
+            raise ValueError(f"{path} is not a scrape job file")
+        return job
+
+    def open(self):
+        # Reopened for appending, after load(), to resume the job
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+            # Start on a fresh line if the last write was cut short
+            if self._file.tell() > 0:
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        self._file.write("\n")
+
+    def record(self, url: str, result: dict):
+        status = result_status(result)
+        with self._lock:
+            self.statuses[url] = status
+            self.results[url] = result
+            self.partials.pop(url, None)
+            self._write({"type": "result", "url": url, "status": status, "result": result})
+            self._file.flush()
+
+    def record_partial(self, url: str, fields: dict):
+        with self._lock:
+            self.partials[url] = fields
+            self._write({"type": "partial", "url": url, "result": fields})
+            self._file.flush()
+
+    def urls_to_run(self, retry_failed: bool = True) -> List[str]:
+        wanted = (PENDING, FAILED) if retry_failed else (PENDING,)
+        return [url for url, status in self.statuses.items() if status in wanted]
+
+    def counts(self) -> Dict[str, int]:
+        counts = {PENDING: 0, DONE: 0, FAILED: 0}
+        for status in self.statuses.values():
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
@@ -0,0 +1,72 @@
+import json
+from functools import lru_cache
+from typing import Callable, List, Tuple, TypeVar
+from openai import OpenAI
+from config import get_api_key, MODEL, LLM_RATE, LLM_BURST, LLM_RATES
+from ratelimit import LimiterRegistry, call_with_limits
+from partial_json import PartialJSONParser
+
+T = TypeVar("T")
+
+# Provider limits are shared by every batch in the process
+_limits = LimiterRegistry(LLM_RATE, LLM_BURST, LLM_RATES)
+
+@lru_cache(maxsize=None)
+def get_client() -> OpenAI:
+    # OPENAI_BASE_URL, if set, is picked up by the client itself. Retries are
+    # left to call_llm so that throttling also slows the provider's rate limiter.
+    return OpenAI(api_key=get_api_key(), max_retries=0)
+
+def set_rate_limit(rate: float, burst: float):
+    """Replace the provider limits, e.g. to benchmark against a local stub."""
+    global _limits
+    _limits = LimiterRegistry(rate, burst)
+
+def model_name() -> str:
+    # MODEL carries a scrapegraphai provider prefix, e.g. "openai/gpt-4o-mini"
+    return MODEL.split("/", 1)[-1]
+
+def provider() -> str:
+    return MODEL.split("/", 1)[0] if "/" in MODEL else "openai"
+
+def call_llm(fn: Callable[[], T]) -> T:
+    """Run an LLM request under the provider's rate limit, retrying rate-limit and server errors."""
+    name = provider()
+    return call_with_limits(fn, _limits.bucket(name), name=f"LLM request ({name})")
+
+def complete_json(messages: List[dict]) -> dict:
+    response = call_llm(lambda: get_client().chat.completions.create(
+        model=model_name(),
+        messages=messages,
+        response_format={"type": "json_object"},
+        temperature=0,
+    ))
+    return json.loads(response.choices[0].message.content)
+
+def stream_json(messages: List[dict], on_partial: Callable[[dict], None]) -> Tuple[dict, Tuple[int, int]]:
+    """Like complete_json, but streams the reply and calls on_partial with the fields parsed so far.
+
+    Returns the complete object and the (prompt, completion) token usage,
+    which is (0, 0) if the provider doesn't report it for streams.
+    """
+    def request():
+        parser = PartialJSONParser()
+        usage = (0, 0)
+        stream = get_client().chat.completions.create(
+            model=model_name(),
+            messages=messages,
+            response_format={"type": "json_object"},
+            temperature=0,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        for chunk in stream:
+            if chunk.usage is not None:
+                usage = (chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+            for choice in chunk.choices:
+                if choice.delta.content:
+                    fields = parser.feed(choice.delta.content)
+                    if fields is not None:
+                        on_partial(fields)
+        return parser.result(), usage
+    return call_llm(request)
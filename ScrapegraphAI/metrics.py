@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+@dataclass
+class UrlMetrics:
+    url: str
+    status: str = "done"
+    total_seconds: float = 0.0
+    fetch_seconds: float = 0.0
+    page_bytes: int = 0
+    page_tokens: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    llm_seconds: float = 0.0
+    first_field_seconds: float = 0.0
+    retries: int = 0
+    cache_hit: bool = False
+    page_store_hit: bool = False
+    batched: bool = False
+    deduplicated: bool = False
+
+_local = threading.local()
+
+def current() -> Optional[UrlMetrics]:
+    """Metrics of the URL being scraped on this thread, if any."""
+    return getattr(_local, "metrics", None)
+
+@contextmanager
+def track(url: str):
+    metrics = UrlMetrics(url)
+    previous = current(), getattr(_local, "started", None)
+    _local.metrics = metrics
+    _local.started = start = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics.total_seconds = time.perf_counter() - start
+        _local.metrics, _local.started = previous
+
+def mark_first_field():
+    """Record the time from the start of the current URL to its first streamed field."""
+    metrics = current()
+    if metrics is not None and not metrics.first_field_seconds:
+        metrics.first_field_seconds = time.perf_counter() - _local.started
+
+@contextmanager
+def timed(field: str):
+    """Add the time spent in the block to a *_seconds field of the current URL's metrics."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = current()
+        if metrics is not None:
+            setattr(metrics, field, getattr(metrics, field) + time.perf_counter() - start)
+
+class Histogram:
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+class MetricsRecorder:
+    """Collects per-URL metrics into a JSONL file and Prometheus-style aggregates.
+
+    Each URL's metrics are appended to the JSONL file as soon as they are
+    recorded; write_prometheus() writes the aggregates in the Prometheus text
+    format, e.g. for node_exporter's textfile collector.
+    """
+
+    def __init__(self, jsonl_path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._file = open(jsonl_path, "a", encoding="utf-8") if jsonl_path else None
+        self.urls: Dict[str, int] = {"done": 0, "failed": 0}
+        self.totals: Dict[str, float] = {
+            "page_bytes": 0, "tokens_in": 0, "tokens_out": 0, "tokens_saved": 0,
+            "retries": 0, "cache_hits": 0, "page_store_hits": 0, "batched": 0,
+            "duplicates": 0,
+        }
+        self.histograms = {
+            "total_seconds": Histogram(),
+            "fetch_seconds": Histogram(),
+            "llm_seconds": Histogram(),
+            "first_field_seconds": Histogram(),
+        }
+        self.started_at = time.time()
+
+    def record(self, metrics: UrlMetrics):
+        with self._lock:
+            self.urls[metrics.status] = self.urls.get(metrics.status, 0) + 1
+            self.totals["page_bytes"] += metrics.page_bytes
+            self.totals["tokens_in"] += metrics.tokens_in
+            self.totals["tokens_out"] += metrics.tokens_out
+            if metrics.tokens_in:
+                self.totals["tokens_saved"] += max(0, metrics.page_tokens - metrics.tokens_in)
+            self.totals["retries"] += metrics.retries
+            self.totals["cache_hits"] += metrics.cache_hit
+            self.totals["page_store_hits"] += metrics.page_store_hit
+            self.totals["batched"] += metrics.batched
+            self.totals["duplicates"] += metrics.deduplicated
+            self.histograms["total_seconds"].observe(metrics.total_seconds)
+            if metrics.fetch_seconds and not metrics.page_store_hit:
+                self.histograms["fetch_seconds"].observe(metrics.fetch_seconds)
+            if metrics.llm_seconds:
+                self.histograms["llm_seconds"].observe(metrics.llm_seconds)
+            if metrics.first_field_seconds:
+                self.histograms["first_field_seconds"].observe(metrics.first_field_seconds)
+            if self._file is not None:
+                self._file.write(json.dumps(asdict(metrics), ensure_ascii=False) + "\n")
+                self._file.flush()
+
+    def summary(self) -> dict:
+        with self._lock:
+            elapsed = time.time() - self.started_at
+            finished = sum(self.urls.values())
+            summary = {
+                "urls": dict(self.urls),
+                "elapsed_seconds": elapsed,
+                "urls_per_second": finished / elapsed if elapsed else 0.0,
+            }
+            summary.update(self.totals)
+            for name, histogram in self.histograms.items():
+                summary[f"mean_{name}"] = histogram.sum / histogram.count if histogram.count else 0.0
+            return summary
+
+    def prometheus_text(self) -> str:
+        lines = []
+        with self._lock:
+            lines += ["# HELP scraper_urls_total URLs finished, by outcome.",
+                      "# TYPE scraper_urls_total counter"]
+            for status, count in self.urls.items():
+                lines.append(f'scraper_urls_total{{status="{status}"}} {count}')
+            for name, value in self.totals.items():
+                lines += [f"# TYPE scraper_{name}_total counter", f"scraper_{name}_total {value:g}"]
+            for name, histogram in self.histograms.items():
+                metric = f"scraper_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f'{metric}_bucket{{le="{bound:g}"}} {count}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum {histogram.sum:.6f}")
+                lines.append(f"{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        # Written to a temporary file first so collectors never read a partial file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,75 @@
+import sqlite3
+import logging
+import threading
+import time
+from typing import Optional, NamedTuple
+from urls import normalize_url
+from config import PAGE_STORE_PATH, PAGE_TTL
+
+class StoredPage(NamedTuple):
+    url: str
+    raw_html: str
+    cleaned_html: str
+    fetched_at: float
+
+class PageStore:
+    """Local store of fetched pages so prompts can be re-run without re-fetching."""
+
+    def __init__(self, path: str = PAGE_STORE_PATH, ttl: Optional[float] = PAGE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " key TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " raw_html TEXT NOT NULL,"
+            " cleaned_html TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._drop_content_hash()
+        self._conn.commit()
+
+    def _drop_content_hash(self):
+        # Stores written by earlier versions have an unused content_hash column
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(pages)")]
+        if "content_hash" not in columns:
+            return
+        try:
+            self._conn.execute("ALTER TABLE pages DROP COLUMN content_hash")
+        except sqlite3.OperationalError:
+            # SQLite before 3.35 can't drop columns; the pages can be fetched again
+            logging.warning("Clearing the page store to upgrade its schema")
+            self._conn.execute("DROP TABLE pages")
+            self._conn.execute(
+                "CREATE TABLE pages (key TEXT PRIMARY KEY, url TEXT NOT NULL, raw_html TEXT NOT NULL,"
+                " cleaned_html TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+
+    def get(self, url: str) -> Optional[StoredPage]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, raw_html, cleaned_html, fetched_at FROM pages WHERE key = ?",
+                (normalize_url(url),)
+            ).fetchone()
+        if row is None:
+            return None
+        page = StoredPage(*row)
+        if self.ttl is not None and time.time() - page.fetched_at > self.ttl:
+            return None
+        return page
+
+    def put(self, url: str, raw_html: str, cleaned_html: str) -> StoredPage:
+        page = StoredPage(url, raw_html, cleaned_html, time.time())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (key, url, raw_html, cleaned_html, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (normalize_url(url),) + tuple(page)
+            )
+            self._conn.commit()
+        return page
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
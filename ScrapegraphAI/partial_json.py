@@ -0,0 +1,67 @@
+import json
+from typing import List, Optional
+
+CLOSERS = {"{": "}", "[": "]"}
+
+class PartialJSONParser:
+    """Parses a JSON object while it is still being streamed.
+
+    feed() scans only the new text and keeps track of open strings, objects
+    and arrays. Whenever a value completes, the text so far is closed off
+    and parsed, so callers get every finished field, including finished
+    items of lists still being written, long before the object ends.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._last: Optional[dict] = None
+
+    def feed(self, text: str) -> Optional[dict]:
+        """Add streamed text; returns the fields parsed so far if they changed, else None."""
+        self.buffer += text
+        snapshot = None
+        for i in range(self._pos, len(self.buffer)):
+            ch = self.buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in CLOSERS:
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                snapshot = (i + 1, list(self._stack))
+            elif ch == ",":
+                snapshot = (i, list(self._stack))
+        self._pos = len(self.buffer)
+        if snapshot is None:
+            return None
+
+        end, stack = snapshot
+        start = self.buffer.find("{")
+        if start < 0 or start >= end:
+            return None
+        closing = "".join(CLOSERS[opener] for opener in reversed(stack))
+        try:
+            fields = json.loads(self.buffer[start:end] + closing)
+        except ValueError:
+            return None
+        if not isinstance(fields, dict) or not fields or fields == self._last:
+            return None
+        self._last = fields
+        return fields
+
+    def result(self) -> dict:
+        """The complete object, once the stream has ended."""
+        start = self.buffer.find("{")
+        return json.loads(self.buffer[start if start >= 0 else 0:])
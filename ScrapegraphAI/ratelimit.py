@@ -0,0 +1,228 @@
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from collections import OrderedDict
+from itertools import islice
+from typing import Callable, Dict, Optional, TypeVar
+from metrics import current
+from config import MAX_RETRIES, BACKOFF_BASE, BACKOFF_MAX, BREAKER_THRESHOLD, BREAKER_RESET, LIMITER_MAX_KEYS
+
+T = TypeVar("T")
+
+# Status codes that mean "try again later" rather than "this will never work"
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    pass
+
+class TokenBucket:
+    """Blocking token-bucket limiter that adapts its rate to rejections.
+
+    The rate is halved whenever the remote side pushes back (penalize) and
+    creeps back up towards max_rate with every success (reward), so a
+    batch settles just under the limit the remote side actually enforces.
+    """
+
+    def __init__(self, rate: float, burst: float, min_rate: float = 0.05):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self, retry_after: Optional[float] = None):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            if retry_after:
+                # Hold everyone back until the server says we may continue
+                self._tokens = min(self._tokens, 1 - retry_after * self.rate)
+
+    def reward(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def idle(self) -> bool:
+        """True if the bucket is full at its full rate, i.e. a fresh one would behave the same."""
+        with self._lock:
+            tokens = self._tokens + (time.monotonic() - self._updated) * self.rate
+            return tokens >= self.burst and self.rate >= self.max_rate
+
+class CircuitBreaker:
+    """Stops calls to a failing target for reset_timeout seconds after threshold failures in a row."""
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, reset_timeout: float = BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # Half-open: let one trial call through and keep the rest waiting
+            # for another timeout; its outcome closes or re-opens the circuit
+            self._opened_at = time.monotonic()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+
+    def idle(self) -> bool:
+        with self._lock:
+            return self._failures == 0 and self._opened_at is None
+
+class LimiterRegistry:
+    """Lazily created token buckets and circuit breakers, one per key (host or provider).
+
+    Beyond max_keys, the least recently used buckets and breakers are
+    dropped once they are idle (full and closed), since a new one would act
+    the same. Batches over many distinct hosts therefore stay in bounded
+    memory.
+    """
+
+    # How many of the oldest entries are checked for eviction per lookup
+    EVICT_SCAN = 32
+
+    def __init__(self, rate: float, burst: float, rates: Optional[Dict[str, float]] = None,
+                 max_keys: int = LIMITER_MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.rates = rates or {}
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._breakers: "OrderedDict[str, CircuitBreaker]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bucket(self, key: str) -> TokenBucket:
+        return self._get(self._buckets, key, lambda: TokenBucket(self.rates.get(key, self.rate), self.burst))
+
+    def breaker(self, key: str) -> CircuitBreaker:
+        return self._get(self._breakers, key, CircuitBreaker)
+
+    def _get(self, entries: OrderedDict, key: str, factory: Callable):
+        with self._lock:
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = factory()
+            entries.move_to_end(key)
+            if len(entries) > self.max_keys:
+                for old in list(islice(entries, self.EVICT_SCAN)):
+                    if len(entries) <= self.max_keys:
+                        break
+                    if old != key and entries[old].idle():
+                        del entries[old]
+            return entry
+
+def error_status(error: Exception) -> Optional[int]:
+    for source in (error, getattr(error, "response", None)):
+        for attr in ("status", "status_code"):
+            value = getattr(source, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header on the error, if any."""
+    headers = getattr(error, "headers", None) or getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def is_throttled(error: Exception) -> bool:
+    if error_status(error) == 429:
+        return True
+    message = str(error).lower()
+    return "rate limit" in message or "too many requests" in message
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, CircuitOpenError):
+        return False
+    status = error_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    if is_throttled(error):
+        return True
+    # No status at all: network trouble (timeouts, resets) is worth another try
+    if isinstance(error, (ConnectionError, TimeoutError, OSError)):
+        return True
+    return "timeout" in type(error).__name__.lower() or "net::err_" in str(error).lower()
+
+def call_with_limits(fn: Callable[[], T], bucket: TokenBucket, breaker: Optional[CircuitBreaker] = None,
+                     name: str = "", max_retries: int = MAX_RETRIES) -> T:
+    """Call fn under a rate limit, retrying transient failures with jittered exponential backoff.
+
+    The breaker counts failed calls, not attempts: one failure is recorded
+    once a call has used up its retries, so a single broken URL can't open
+    the circuit for its whole host.
+    """
+    if breaker is not None and not breaker.allow():
+        raise CircuitOpenError(f"Circuit open for {name}: too many consecutive failures")
+    attempt = 0
+    while True:
+        bucket.acquire()
+        try:
+            result = fn()
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            delay = retry_after(e)
+            # A Retry-After beyond BACKOFF_MAX isn't worth holding a worker
+            # for; leave it for a resume
+            if attempt >= max_retries or (delay is not None and delay > BACKOFF_MAX):
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
+            if is_throttled(e):
+                bucket.penalize(delay)
+            if delay is None:
+                # Full jitter keeps workers that failed together from retrying together
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            attempt += 1
+            metrics = current()
+            if metrics is not None:
+                metrics.retries += 1
+            logging.warning(f"Retrying {name} in {delay:.1f}s (attempt {attempt}/{max_retries}): {str(e)}")
+            time.sleep(delay)
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        bucket.reward()
+        return result
@@ -0,0 +1,184 @@
+import re
+import hashlib
+from typing import List, NamedTuple, Optional
+from bs4 import BeautifulSoup
+from bs4.element import PreformattedString
+from config import TOKEN_BUDGET, CHUNK_TOKENS, DEDUPE_MIN_CHARS
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _encoding = None
+
+# Whole elements that are never page content
+BOILERPLATE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "button"]
+# Layout chrome, stripped only at page level; inside <main> or <article> a
+# <header> usually holds the title and the lead. A page-level <header> with
+# the page's <h1> is kept too, minus its <nav>.
+PAGE_CHROME_TAGS = ["nav", "footer", "header", "aside"]
+# Whole id/class tokens of cookie banners, popups, login and search forms and
+# other page furniture. Forms in general are kept: ASP.NET pages wrap the
+# whole body in one.
+BOILERPLATE_PATTERN = re.compile(
+    r"(cookie|consent|gdpr)([-_](banner|bar|notice|popup|modal|wall))?|"
+    r"popup|modal([-_](backdrop|overlay|dialog))?|newsletter([-_](signup|form))?|subscribe[-_]form|"
+    r"sidebar|breadcrumbs?|share[-_](buttons|links|bar)|social[-_](share|links|icons)|"
+    r"adverts?|ad[-_](banner|slot|container)|promo[-_](banner|bar)|skip[-_]link|"
+    r"(login|log[-_]?in|sign[-_]?in|search)([-_]?(form|box|bar))?",
+    re.IGNORECASE
+)
+# Elements that start a new block of text; text nodes are grouped by the
+# nearest of these around them, so copy in plain <div>s is kept as well
+BLOCK_TAGS = ["html", "body", "main", "article", "section", "header", "footer", "nav", "aside",
+              "div", "form", "fieldset", "figure", "figcaption", "address", "details", "summary",
+              "h1", "h2", "h3", "h4", "h5", "h6", "p", "blockquote", "pre", "hr",
+              "ul", "ol", "li", "dl", "dt", "dd", "table", "caption", "tr", "td", "th"]
+# Text inside these is never shown on the page
+HIDDEN_TAGS = {"head", "title", "script", "style", "noscript", "template"}
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "to", "in", "on", "for", "from", "with", "by",
+    "is", "are", "be", "as", "at", "or", "it", "its", "this", "that", "what",
+    "which", "all", "any", "me", "give", "get", "find", "extract", "list", "return",
+}
+
+class ReducedPage(NamedTuple):
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+def count_tokens(text: str) -> int:
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    # Rough rule of thumb for English text when tiktoken is unavailable
+    return (len(text) + 3) // 4
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if _encoding is not None:
+        return _encoding.decode(_encoding.encode(text, disallowed_special=())[:max_tokens])
+    return text[:max_tokens * 4]
+
+def strip_boilerplate(soup: BeautifulSoup):
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+    for tag in soup(PAGE_CHROME_TAGS):
+        if tag.decomposed or tag.find_parent(["main", "article"]):
+            continue
+        if tag.name == "header" and tag.find("h1"):
+            continue
+        tag.decompose()
+    for tag in soup.find_all(True):
+        if tag.decomposed or tag.attrs is None or tag.name in ("html", "body", "main", "article"):
+            continue
+        if tag.name == "form" and tag.get("role") == "search":
+            tag.decompose()
+            continue
+        tokens = [tag.get("id") or ""] + list(tag.get("class") or [])
+        if any(BOILERPLATE_PATTERN.fullmatch(token) for token in tokens if token):
+            tag.decompose()
+
+def text_blocks(soup: BeautifulSoup, unique: bool = True) -> List[str]:
+    """The page's visible text, one block per run of text sharing a block-level parent.
+
+    With unique, a block repeating an earlier one (menus, "Read more") is dropped.
+    """
+    blocks, seen = [], set()
+    current, owner = [], None
+
+    def flush():
+        text = " ".join("".join(current).split())
+        if text and not (unique and text in seen):
+            seen.add(text)
+            blocks.append(text)
+
+    for string in soup.find_all(string=True):
+        # Comments, doctypes and CDATA aren't visible text
+        if isinstance(string, PreformattedString) or string.find_parent(HIDDEN_TAGS):
+            continue
+        parent = string.find_parent(BLOCK_TAGS)
+        if parent is not owner:
+            flush()
+            current, owner = [], parent
+        current.append(str(string))
+    flush()
+    return blocks
+
+def page_fingerprint(html: str, min_chars: int = DEDUPE_MIN_CHARS) -> Optional[str]:
+    """Hash of a page's title and visible content, ignoring markup and page chrome.
+
+    Mirrors and aliases of a page usually differ only in markup, scripts or
+    navigation, so they share a fingerprint. Pages with less than min_chars
+    of visible text, such as app shells still loading, get None, because
+    unrelated pages share the same placeholder text.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    title = " ".join(soup.title.get_text(" ", strip=True).split()) if soup.title else ""
+    strip_boilerplate(soup)
+    # All visible text, repeats included; text_blocks drops repeated blocks
+    text = " ".join(" ".join(text_blocks(soup, unique=False)).split())
+    if len(text) < min_chars:
+        return None
+    return hashlib.sha256(f"{title}\n{text}".lower().encode("utf-8")).hexdigest()
+
+def chunk_blocks(blocks: List[str], chunk_tokens: int) -> List[str]:
+    chunks, current, current_tokens = [], [], 0
+    for block in blocks:
+        tokens = count_tokens(block)
+        if current and current_tokens + tokens > chunk_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(block)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+def keywords(prompt: str) -> set:
+    return {w for w in re.findall(r"[a-z0-9]+", prompt.lower()) if len(w) > 2 and w not in STOPWORDS}
+
+def relevance(chunk: str, terms: set) -> float:
+    if not terms:
+        return 0.0
+    words = re.findall(r"[a-z0-9]+", chunk.lower())
+    if not words:
+        return 0.0
+    hits = sum(1 for w in words if w in terms or any(w.startswith(t) for t in terms))
+    return hits / len(words) ** 0.5
+
+def reduce_page(html: str, prompt: str, token_budget: int = TOKEN_BUDGET,
+                chunk_tokens: int = CHUNK_TOKENS) -> ReducedPage:
+    """Strip boilerplate and keep the chunks most relevant to the prompt within the token budget.
+
+    Chunks are ranked by keyword overlap with the prompt, then the selected
+    ones are put back in page order so the LLM still sees a coherent page.
+    Earlier chunks win ties, since the top of a page usually says what it is.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    strip_boilerplate(soup)
+    blocks = text_blocks(soup)
+    # Measured on the visible text, since markup never reaches the LLM anyway
+    tokens_before = count_tokens("\n".join(blocks))
+    chunks = chunk_blocks(blocks, chunk_tokens)
+
+    terms = keywords(prompt)
+    ranked = sorted(range(len(chunks)), key=lambda i: (-relevance(chunks[i], terms), i))
+    selected, used = [], 0
+    for i in ranked:
+        tokens = count_tokens(chunks[i])
+        if used + tokens > token_budget:
+            continue
+        selected.append(i)
+        used += tokens
+
+    if selected:
+        text = "\n\n".join(chunks[i] for i in sorted(selected))
+    elif chunks:
+        # Even the best chunk is over budget on its own; keep its head
+        text = truncate_to_tokens(chunks[ranked[0]], token_budget)
+    else:
+        text = ""
+    return ReducedPage(text, tokens_before, count_tokens(text))
@@ -0,0 +1,84 @@
+import logging
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Iterable, Optional
+from urls import get_host
+from config import MAX_CONCURRENCY, MAX_PER_HOST
+
+class ScrapeScheduler:
+    """Runs a worker over many URLs with a global and a per-host concurrency cap.
+
+    URLs are pulled lazily from the iterable, so very large batches are never
+    materialized. Results are reported through on_result in completion order,
+    from the thread that called run().
+    """
+
+    def __init__(self, worker: Callable[[str], dict],
+                 max_concurrency: int = MAX_CONCURRENCY,
+                 max_per_host: int = MAX_PER_HOST):
+        self.worker = worker
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_per_host = max(1, max_per_host)
+        # How many host-saturated URLs we hold back before pausing the input
+        self.lookahead = self.max_concurrency * 4
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, urls: Iterable[str], on_result: Callable[[str, dict], None],
+            on_start: Optional[Callable[[str], None]] = None):
+        url_iter = iter(urls)
+        exhausted = False
+        deferred = deque()
+        host_counts = Counter()
+        in_flight = {}
+
+        def next_ready() -> Optional[str]:
+            nonlocal exhausted
+            for _ in range(len(deferred)):
+                url = deferred.popleft()
+                if host_counts[get_host(url)] < self.max_per_host:
+                    return url
+                deferred.append(url)
+            while not exhausted and not self._stop.is_set() and len(deferred) < self.lookahead:
+                try:
+                    url = next(url_iter).strip()
+                except StopIteration:
+                    exhausted = True
+                    break
+                if not url:
+                    continue
+                if host_counts[get_host(url)] < self.max_per_host:
+                    return url
+                deferred.append(url)
+            return None
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            while True:
+                while len(in_flight) < self.max_concurrency and not self._stop.is_set():
+                    url = next_ready()
+                    if url is None:
+                        break
+                    host_counts[get_host(url)] += 1
+                    if on_start:
+                        on_start(url)
+                    in_flight[executor.submit(self.worker, url)] = url
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = in_flight.pop(future)
+                    host = get_host(url)
+                    host_counts[host] -= 1
+                    if not host_counts[host]:
+                        del host_counts[host]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logging.error(f"Error scraping {url}: {str(e)}")
+                        result = {"error": str(e)}
+                    on_result(url, result)
@@ -1,18 +1,195 @@
+import json
 import logging
+import time
+from typing import Callable, Optional, Tuple
 from scrapegraphai.graphs import SmartScraperGraph
-from config import create_scraper_config
+from config import create_scraper_config, MODEL, TOKEN_BUDGET, BATCH_PAGE_MAX_TOKENS
+from cache import ResultCache
+from page_store import PageStore, StoredPage
+from fetcher import Fetcher, clean_html
+from reduce import reduce_page, count_tokens, page_fingerprint
+from batching import ExtractionBatcher
+from dedupe import DedupeIndex, reuse
+from urls import normalize_url
+from llm import call_llm, stream_json
+from metrics import MetricsRecorder, current, timed, track, mark_first_field
+
+STREAM_SYSTEM_PROMPT = (
+    "You extract information from a web page. Answer the user's request using only "
+    "the page content given. Reply with a single JSON object holding the extracted "
+    "information, with one key per requested item."
+)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def scrape_company_info(url: str, prompt: str) -> dict:
+def fetch_stage(url: str, fetcher: Fetcher, store: Optional[PageStore] = None,
+                refresh: bool = False) -> StoredPage:
+    metrics = current()
+    if store is not None and not refresh:
+        page = store.get(url)
+        if page is not None:
+            if metrics is not None:
+                metrics.page_store_hit = True
+                metrics.page_bytes = len(page.raw_html.encode("utf-8"))
+            return page
+    with timed("fetch_seconds"):
+        raw_html = fetcher.fetch(url)
+    if metrics is not None:
+        metrics.page_bytes = len(raw_html.encode("utf-8"))
+    cleaned_html = clean_html(raw_html)
+    if store is None:
+        return StoredPage(url, raw_html, cleaned_html, time.time())
+    return store.put(url, raw_html, cleaned_html)
+
+def extract_stage(page: StoredPage, prompt: str, token_budget: int = TOKEN_BUDGET,
+                  batcher: Optional[ExtractionBatcher] = None,
+                  on_partial: Optional[Callable[[str, dict], None]] = None) -> dict:
+    reduced = reduce_page(page.cleaned_html, prompt, token_budget)
+    logging.info(f"Reduced {page.url} from {reduced.tokens_before} to {reduced.tokens_after} tokens "
+                 f"({reduced.tokens_saved} saved)")
+    metrics = current()
+    if metrics is not None:
+        metrics.page_tokens = reduced.tokens_before
+    if batcher is not None and reduced.tokens_after <= BATCH_PAGE_MAX_TOKENS:
+        with timed("llm_seconds"):
+            result = batcher.extract(page.url, reduced.text, prompt)
+        if result is not None:
+            if metrics is not None:
+                # The request is shared, so count this page's part of it
+                metrics.batched = True
+                metrics.tokens_in = reduced.tokens_after
+                metrics.tokens_out = count_tokens(json.dumps(result, ensure_ascii=False))
+            return result
+    if on_partial is not None:
+        return stream_stage(page.url, reduced.text, prompt, on_partial)
+    # SmartScraperGraph fetches any source starting with "http" and treats
+    # anything else as local content. The reduced text may start with a link,
+    # so it is prefixed with a line naming the page to keep extraction offline.
+    smart_scraper_graph = SmartScraperGraph(
+        prompt=prompt,
+        source=f"Page: {page.url}\n\n{reduced.text}",
+        config=create_scraper_config()
+    )
+    with timed("llm_seconds"):
+        result = call_llm(smart_scraper_graph.run)
+    if metrics is not None:
+        metrics.tokens_in, metrics.tokens_out = graph_token_usage(smart_scraper_graph)
+        if not metrics.tokens_in:
+            metrics.tokens_in = reduced.tokens_after
+    return result
+
+def stream_stage(url: str, text: str, prompt: str, on_partial: Callable[[str, dict], None]) -> dict:
+    """Extract with a streamed LLM reply, passing fields to on_partial as they complete."""
+    def on_fields(fields: dict):
+        mark_first_field()
+        on_partial(url, fields)
+
+    messages = [
+        {"role": "system", "content": STREAM_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Request: {prompt}\n\nPage content:\n{text}"},
+    ]
+    with timed("llm_seconds"):
+        result, (tokens_in, tokens_out) = stream_json(messages, on_fields)
+    metrics = current()
+    if metrics is not None:
+        metrics.tokens_in = tokens_in or count_tokens(text)
+        metrics.tokens_out = tokens_out or count_tokens(json.dumps(result, ensure_ascii=False))
+    return result
+
+def graph_token_usage(graph: SmartScraperGraph) -> Tuple[int, int]:
+    """Prompt and completion tokens reported by a finished graph, (0, 0) if unavailable."""
     try:
-        smart_scraper_graph = SmartScraperGraph(
-            prompt=prompt,
-            source=url,
-            config=create_scraper_config()
-        )
-        return smart_scraper_graph.run()
+        info = graph.get_execution_info() or []
+    except Exception:
+        return 0, 0
+    totals = [node for node in info if node.get("node_name") == "TOTAL RESULT"] or info
+    prompt_tokens = sum(int(node.get("prompt_tokens") or 0) for node in totals)
+    completion_tokens = sum(int(node.get("completion_tokens") or 0) for node in totals)
+    return prompt_tokens, completion_tokens
+
+def scrape_company_info(url: str, prompt: str, fetcher: Optional[Fetcher] = None,
+                        cache: Optional[ResultCache] = None, refresh: bool = False,
+                        store: Optional[PageStore] = None, refetch: bool = False,
+                        batcher: Optional[ExtractionBatcher] = None,
+                        metrics: Optional[MetricsRecorder] = None,
+                        dedupe: Optional[DedupeIndex] = None,
+                        on_partial: Optional[Callable[[str, dict], None]] = None) -> dict:
+    """Scrape one URL. With on_partial, the reply is streamed and on_partial(url, fields)
+    is called with the fields extracted so far as they are generated."""
+    with track(url) as url_metrics:
+        result = _scrape(url, prompt, fetcher, cache, refresh, store, refetch, batcher, dedupe, on_partial)
+        url_metrics.status = "failed" if "error" in result else "done"
+    if metrics is not None:
+        metrics.record(url_metrics)
+    return result
+
+def _scrape(url: str, prompt: str, fetcher: Optional[Fetcher], cache: Optional[ResultCache],
+            refresh: bool, store: Optional[PageStore], refetch: bool,
+            batcher: Optional[ExtractionBatcher], dedupe: Optional[DedupeIndex],
+            on_partial: Optional[Callable[[str, dict], None]]) -> dict:
+    if cache is not None and not refresh:
+        cached = cache.get(url, prompt, MODEL)
+        if cached is not None:
+            logging.info(f"Cache hit for {url}")
+            current().cache_hit = True
+            return cached
+    # Aliases of a URL already being scraped in this batch wait for its result
+    owned = []
+    if dedupe is not None:
+        url_key = f"url:{normalize_url(url)}"
+        duplicate = _claim(dedupe, url_key, url)
+        if duplicate is not None:
+            return duplicate
+        owned.append(url_key)
+    # Without a shared fetcher this is a one-off call, so it gets its own
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        fetcher = Fetcher(pool_size=1)
+    result = None
+    try:
+        page = fetch_stage(url, fetcher, store, refresh=refetch)
+        # Pages too short to tell apart, like app shells still loading, get no
+        # fingerprint and are only deduplicated by URL
+        fingerprint = page_fingerprint(page.cleaned_html) if cache is not None or dedupe is not None else None
+        if fingerprint is not None and cache is not None and not refresh:
+            previous = cache.get_content(fingerprint, prompt, MODEL)
+            if previous is not None and normalize_url(previous[0]) != normalize_url(url):
+                logging.info(f"{url} has the same content as {previous[0]}, reusing its result")
+                current().deduplicated = True
+                result = reuse(*previous)
+        if result is None and fingerprint is not None and dedupe is not None:
+            content_key = f"content:{fingerprint}"
+            result = _claim(dedupe, content_key, url)
+            if result is None:
+                owned.append(content_key)
+        if result is None:
+            result = extract_stage(page, prompt, batcher=batcher, on_partial=on_partial)
+            if fingerprint is not None and cache is not None and "error" not in result:
+                cache.put_content(fingerprint, prompt, MODEL, url, result)
     except Exception as e:
         logging.error(f"Error scraping {url}: {str(e)}")
-        return {"error": str(e)}
\ No newline at end of file
+        result = {"error": str(e)}
+        return result
+    finally:
+        if own_fetcher:
+            fetcher.close()
+        for key in owned:
+            dedupe.resolve(key, url, result)
+    if cache is not None:
+        cache.put(url, prompt, MODEL, result)
+    return result
+
+def _claim(dedupe: DedupeIndex, key: str, url: str) -> Optional[dict]:
+    """Claim key for url, or return the result of the URL that already owns it."""
+    while True:
+        owner = dedupe.claim(key)
+        if owner is None:
+            return None
+        previous = owner.result()
+        if previous is not None:
+            break
+        # The owner failed and released the key, so try to take it over
+    logging.info(f"{url} is a duplicate of {previous[0]}, reusing its result")
+    current().deduplicated = True
+    return reuse(*previous)
@@ -1,13 +1,28 @@
 import json
-import csv
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox
 from typing import List, Dict
 from datetime import datetime
-import tempfile
 import os
+import queue
 import threading
 from scraper import scrape_company_info
+from scheduler import ScrapeScheduler
+from cache import ResultCache
+from page_store import PageStore
+from fetcher import Fetcher
+from batching import ExtractionBatcher
+from dedupe import DedupeIndex
+from jobs import ScrapeJob, job_path
+from export import CSVExporter
+from metrics import MetricsRecorder
+from config import MAX_CONCURRENCY, MAX_PER_HOST, UI_REFRESH_MS, METRICS_DIR, STREAM_RESULTS
+
+# Markers shown next to each URL in the status pane
+STATUS_PENDING = " "
+STATUS_RUNNING = "…"
+STATUS_DONE = "✓"
+STATUS_FAILED = "✗"
 
 class ScraperUI:
     def __init__(self, master):
@@ -18,6 +33,16 @@ class ScraperUI:
         self.create_widgets()
         self.apply_theme()
 
+        # Worker threads never touch widgets; they post to this queue, which
+        # the Tk main loop drains at a fixed rate
+        self.ui_queue = queue.Queue()
+        self.url_lines: Dict[str, List[int]] = {}
+        # Start and end marks of each URL's block in the results pane, so a
+        # retried or streamed URL's block is replaced rather than repeated
+        self.result_marks: Dict[str, tuple] = {}
+        self.result_count = 0
+        master.after(UI_REFRESH_MS, self.drain_ui_queue)
+
         # Configure the main window to be resizable
         master.columnconfigure(0, weight=1)
         master.columnconfigure(1, weight=1)
@@ -58,9 +83,38 @@ class ScraperUI:
         button_frame.pack(pady=10)
         self.scrape_button = ttk.Button(button_frame, text="Scrape", command=self.start_scraping)
         self.scrape_button.pack(side=tk.LEFT, padx=5)
+        self.stop_button = ttk.Button(button_frame, text="Stop", command=self.stop_scraping, state='disabled')
+        self.stop_button.pack(side=tk.LEFT, padx=5)
         self.dark_mode_button = ttk.Button(button_frame, text="Toggle Dark Mode", command=self.toggle_dark_mode)
         self.dark_mode_button.pack(side=tk.LEFT, padx=5)
 
+        options_frame = ttk.Frame(left_pane)
+        options_frame.pack(pady=(0, 10))
+        self.concurrency = tk.IntVar(value=MAX_CONCURRENCY)
+        self.per_host = tk.IntVar(value=MAX_PER_HOST)
+        ttk.Label(options_frame, text="Concurrency:").pack(side=tk.LEFT)
+        ttk.Spinbox(options_frame, from_=1, to=64, width=4, textvariable=self.concurrency).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Label(options_frame, text="Per host:").pack(side=tk.LEFT)
+        ttk.Spinbox(options_frame, from_=1, to=16, width=4, textvariable=self.per_host).pack(side=tk.LEFT)
+        self.bypass_cache = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Bypass cache", variable=self.bypass_cache).pack(side=tk.LEFT, padx=(10, 0))
+        self.refetch_pages = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Refetch pages", variable=self.refetch_pages).pack(side=tk.LEFT, padx=(10, 0))
+        self.batch_pages = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Batch small pages", variable=self.batch_pages).pack(side=tk.LEFT, padx=(10, 0))
+        self.stream_results = tk.BooleanVar(value=STREAM_RESULTS)
+        ttk.Checkbutton(options_frame, text="Stream results", variable=self.stream_results).pack(side=tk.LEFT, padx=(10, 0))
+
+        job_frame = ttk.Frame(left_pane)
+        job_frame.pack(pady=(0, 10))
+        ttk.Label(job_frame, text="Job name:").pack(side=tk.LEFT)
+        self.job_name = tk.StringVar(value=f"job_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        ttk.Entry(job_frame, textvariable=self.job_name, width=30).pack(side=tk.LEFT, padx=(0, 10))
+        self.resume_button = ttk.Button(job_frame, text="Resume Job", command=self.resume_job)
+        self.resume_button.pack(side=tk.LEFT, padx=5)
+        self.load_button = ttk.Button(job_frame, text="Load Job", command=self.load_job)
+        self.load_button.pack(side=tk.LEFT, padx=5)
+
         self.create_title(left_pane, "Scraping Progress", "TitleLabel.TLabel")
         self.progress_bar = ttk.Progressbar(left_pane, orient='horizontal', length=300, mode='determinate')
         self.progress_bar.pack(fill=tk.X, pady=(0, 10))
@@ -87,7 +141,10 @@ class ScraperUI:
         self.results_display.pack(fill=tk.BOTH, expand=True)
 
         self.results: Dict[str, dict] = {}
-        self.temp_file = tempfile.NamedTemporaryFile(mode='w+', delete=False, suffix='.json', encoding='utf-8')
+        self.cache = ResultCache()
+        self.page_store = PageStore()
+        self.job = None
+        self.scheduler = None
 
     def create_title(self, parent, text, style):
         title = ttk.Label(parent, text=text, style=style)
@@ -115,62 +172,264 @@ class ScraperUI:
         self.apply_theme()
 
     def start_scraping(self):
+        urls = self.url_input.get("1.0", tk.END).strip().split("\n")
+        prompt = self.prompt_input.get("1.0", tk.END).strip()
+        if not prompt:
+            prompt = "extract Project Name and Purpose"
+
+        name = self.job_name.get().strip()
+        try:
+            if os.path.exists(job_path(name)) and not messagebox.askyesno(
+                    "Job Exists", f"A job named '{name}' already exists. Overwrite it?"):
+                return
+            job = ScrapeJob.create(name, urls, prompt)
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Job Error", str(e))
+            return
+
+        self.results = {}
+        self.run_job(job, job.urls_to_run())
+
+    def resume_job(self):
+        job = self.open_job()
+        if job is None:
+            return
+        job.open()
+        urls = job.urls_to_run(retry_failed=True)
+        if not urls:
+            job.close()
+            messagebox.showinfo("Job Complete", f"Every URL in '{job.name}' has already been scraped.")
+            return
+        self.run_job(job, urls)
+
+    def load_job(self):
+        job = self.open_job()
+        if job is None:
+            return
+        counts = job.counts()
+        self.log_to_console(f"Loaded job '{job.name}': {counts['done']} done, "
+                            f"{counts['failed']} failed, {counts['pending']} pending.")
+        self.display_results()
+        # URLs cut off mid-extraction show the fields they had streamed
+        self.append_results(job.partials.items())
+        if self.results:
+            self.export_button.config(state='normal')
+
+    def open_job(self):
+        """Load the named job and show its URLs, prompt and results."""
+        try:
+            job = ScrapeJob.load(self.job_name.get().strip())
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Job Error", str(e))
+            return None
+        self.url_input.delete("1.0", tk.END)
+        self.url_input.insert(tk.END, "\n".join(job.statuses))
+        self.prompt_input.delete("1.0", tk.END)
+        self.prompt_input.insert(tk.END, job.prompt)
+        self.results = dict(job.results)
+        self.progress_bar['value'] = (job.counts()['done'] / len(job.statuses)) * 100 if job.statuses else 0
+        self.update_url_status()
+        return job
+
+    def run_job(self, job: ScrapeJob, urls: List[str]):
+        self.job = job
         self.scrape_button.config(state='disabled')
+        self.stop_button.config(state='normal')
+        self.resume_button.config(state='disabled')
+        self.load_button.config(state='disabled')
         self.export_button.config(state='disabled')
-        self.results = {}
-        self.progress_bar['value'] = 0
+        finished = len(job.statuses) - len(urls)
+        self.progress_bar['value'] = (finished / len(job.statuses)) * 100 if job.statuses else 0
         self.console_output.config(state='normal')
         self.console_output.delete('1.0', tk.END)
         self.console_output.config(state='disabled')
         self.update_url_status()
-        
-        urls = self.url_input.get("1.0", tk.END).strip().split("\n")
-        prompt = self.prompt_input.get("1.0", tk.END).strip()
-        if not prompt:
-            prompt = "extract Project Name and Purpose"
-        
-        threading.Thread(target=self.scrape, args=(urls, prompt), daemon=True).start()
+        self.display_results()
+
+        threading.Thread(
+            target=self.scrape,
+            args=(urls, job.prompt, self.concurrency.get(), self.per_host.get(),
+                  self.bypass_cache.get(), self.refetch_pages.get(), self.batch_pages.get(),
+                  self.stream_results.get()),
+            daemon=True
+        ).start()
 
     def update_url_status(self):
-        self.url_status.config(state='normal')
-        self.url_status.delete('1.0', tk.END)
+        """Redraw the whole status pane; during a run only changed lines are redrawn."""
+        self.url_lines = {}
+        lines = []
         urls = self.url_input.get("1.0", tk.END).strip().split("\n")
         for i, url in enumerate(urls, start=1):
-            status = "✓" if url in self.results else " "
-            self.url_status.insert(tk.END, f"{i}. [{status}]\n")
+            url = url.strip()
+            self.url_lines.setdefault(url, []).append(i)
+            lines.append(f"{i}. [{self.status_marker(url)}]")
+        self.url_status.config(state='normal')
+        self.url_status.delete('1.0', tk.END)
+        self.url_status.insert(tk.END, "\n".join(lines) + "\n")
         self.url_status.config(state='disabled')
 
-    def scrape(self, urls: List[str], prompt: str):
-        total_urls = len(urls)
-        for i, url in enumerate(urls, start=1):
-            if url:
-                self.log_to_console(f"Scraping URL {i}/{total_urls}: {url}")
-                result = scrape_company_info(url, prompt)
+    def status_marker(self, url: str) -> str:
+        if url not in self.results:
+            return STATUS_PENDING
+        return STATUS_FAILED if "error" in self.results[url] else STATUS_DONE
+
+    def set_url_status(self, statuses: Dict[str, str]):
+        self.url_status.config(state='normal')
+        for url, marker in statuses.items():
+            for line in self.url_lines.get(url, []):
+                self.url_status.delete(f"{line}.0", f"{line}.end")
+                self.url_status.insert(f"{line}.0", f"{line}. [{marker}]")
+        self.url_status.config(state='disabled')
+
+    def scrape(self, urls: List[str], prompt: str, max_concurrency: int = MAX_CONCURRENCY,
+               max_per_host: int = MAX_PER_HOST, refresh: bool = False, refetch: bool = False,
+               batch_pages: bool = False, stream: bool = False):
+        urls = [url.strip() for url in urls if url.strip()]
+        # A resumed job counts the URLs finished in earlier runs
+        total_urls = len(self.job.statuses)
+        completed = total_urls - len(urls)
+
+        def on_start(url: str):
+            self.post("status", url, STATUS_RUNNING)
+            self.log_to_console(f"Scraping: {url}")
+
+        def on_result(url: str, result: dict):
+            nonlocal completed
+            completed += 1
+            self.job.record(url, result)
+            self.post("result", url, result)
+            self.post("status", url, STATUS_FAILED if "error" in result else STATUS_DONE)
+            self.post("progress", (completed / total_urls) * 100)
+            self.log_to_console(f"Finished URL {completed}/{total_urls}: {url}")
+
+        def on_partial(url: str, fields: dict):
+            self.job.record_partial(url, fields)
+            self.post("partial", url, fields)
+
+        # One fetcher for the whole batch so browsers and connections are reused
+        fetcher = Fetcher(pool_size=max_concurrency)
+        batcher = ExtractionBatcher() if batch_pages else None
+        dedupe = DedupeIndex()
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        metrics_base = os.path.join(METRICS_DIR, self.job.name)
+        metrics = MetricsRecorder(f"{metrics_base}.jsonl")
+        self.scheduler = scheduler = ScrapeScheduler(
+            lambda url: scrape_company_info(url, prompt, fetcher=fetcher, cache=self.cache,
+                                            refresh=refresh, store=self.page_store, refetch=refetch,
+                                            batcher=batcher, metrics=metrics, dedupe=dedupe,
+                                            on_partial=on_partial if stream else None),
+            max_concurrency=max_concurrency,
+            max_per_host=max_per_host
+        )
+        try:
+            scheduler.run(urls, on_result, on_start=on_start)
+        finally:
+            fetcher.close()
+            self.job.close()
+            metrics.write_prometheus(f"{metrics_base}.prom")
+            metrics.close()
+            summary = metrics.summary()
+            self.log_to_console(
+                f"Scraping completed in {summary['elapsed_seconds']:.1f}s "
+                f"({summary['urls_per_second']:.2f} URLs/s, {summary['cache_hits']:g} cache hits, "
+                f"{summary['duplicates']:g} duplicates, "
+                f"{summary['retries']:g} retries, {summary['tokens_in']:g} tokens in, "
+                f"{summary['tokens_out']:g} tokens out).")
+            self.post("finished")
+
+    def post(self, kind: str, *payload):
+        self.ui_queue.put((kind, payload))
+
+    def drain_ui_queue(self):
+        logs = []
+        statuses: Dict[str, str] = {}
+        results = []
+        partials: Dict[str, dict] = {}
+        progress = None
+        finished = False
+        try:
+            while True:
+                kind, payload = self.ui_queue.get_nowait()
+                if kind == "log":
+                    logs.append(payload[0])
+                elif kind == "status":
+                    # Only the latest status of each URL in this frame is drawn
+                    statuses[payload[0]] = payload[1]
+                elif kind == "partial":
+                    partials[payload[0]] = payload[1]
+                elif kind == "result":
+                    results.append(payload)
+                    partials.pop(payload[0], None)
+                elif kind == "progress":
+                    progress = payload[0]
+                elif kind == "finished":
+                    finished = True
+        except queue.Empty:
+            pass
+
+        if logs:
+            self.console_output.config(state='normal')
+            self.console_output.insert(tk.END, "\n".join(logs) + "\n")
+            self.console_output.see(tk.END)
+            self.console_output.config(state='disabled')
+        if partials:
+            self.append_results(partials.items())
+        if results:
+            for url, result in results:
                 self.results[url] = result
-                self.save_to_temp_file(url, result)
-                self.update_url_status()
-                self.progress_bar['value'] = (i / total_urls) * 100
-                self.master.update_idletasks()
-        
-        self.display_results()
-        self.scrape_button.config(state='normal')
-        self.export_button.config(state='normal')
-        self.log_to_console("Scraping completed.")
+            self.append_results(results)
+        if statuses:
+            self.set_url_status(statuses)
+        if progress is not None:
+            self.progress_bar['value'] = progress
+        if finished:
+            self.scheduler = None
+            self.scrape_button.config(state='normal')
+            self.stop_button.config(state='disabled')
+            self.resume_button.config(state='normal')
+            self.load_button.config(state='normal')
+            self.export_button.config(state='normal')
+
+        self.master.after(UI_REFRESH_MS, self.drain_ui_queue)
+
+    def stop_scraping(self):
+        # URLs already being scraped finish; the rest stay pending for "Resume Job"
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.stop_button.config(state='disabled')
+            self.log_to_console("Stopping after the URLs in progress...")
 
     def log_to_console(self, message: str):
-        self.console_output.config(state='normal')
-        self.console_output.insert(tk.END, message + "\n")
-        self.console_output.see(tk.END)
-        self.console_output.config(state='disabled')
-
-    def save_to_temp_file(self, url: str, result: dict):
-        self.temp_file.write(json.dumps({url: result}) + '\n')
-        self.temp_file.flush()
+        # Safe to call from any thread
+        self.post("log", message)
+
+    def append_results(self, results):
+        """Show results, replacing the block of a URL that is already in the pane."""
+        for url, result in results:
+            if url not in self.result_marks:
+                self.result_count += 1
+                start, end = f"result{self.result_count}_start", f"result{self.result_count}_end"
+                # Both marks sit before the block's trailing newline; the end
+                # mark has right gravity so it moves past whatever is inserted
+                self.results_display.insert(tk.END, "\n")
+                for mark, gravity in ((start, tk.LEFT), (end, tk.RIGHT)):
+                    self.results_display.mark_set(mark, "end-2c")
+                    self.results_display.mark_gravity(mark, gravity)
+                self.result_marks[url] = (start, end)
+            self.replace_block(url, result)
+
+    def replace_block(self, url: str, result: dict):
+        start, end = self.result_marks[url]
+        text = json.dumps({url: result}, indent=4, ensure_ascii=False)
+        self.results_display.delete(start, end)
+        self.results_display.insert(start, text)
 
     def display_results(self):
         self.results_display.delete("1.0", tk.END)
-        formatted_results = json.dumps(self.results, indent=4)
-        self.results_display.insert(tk.END, formatted_results)
+        for start, end in self.result_marks.values():
+            self.results_display.mark_unset(start, end)
+        self.result_marks = {}
+        self.append_results(self.results.items())
 
     def export_results(self):
         if not self.results:
@@ -204,35 +463,19 @@ class ScraperUI:
             initialfile=f"scraping_results_{timestamp}.csv"
         )
         if file_path:
-            # Collect all unique keys from all results
-            all_keys = set()
-            for result in self.results.values():
-                all_keys.update(self.flatten_dict(result).keys())
-
-            with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                # Write header
-                header = ['URL'] + list(all_keys)
-                writer.writerow(header)
-
-                # Write data
+            exporter = CSVExporter()
+            try:
                 for url, data in self.results.items():
-                    flat_data = self.flatten_dict(data)
-                    row = [url] + [flat_data.get(key, 'N/A') for key in all_keys]
-                    writer.writerow(row)
+                    exporter.add(url, data)
+                exporter.write(file_path)
+            finally:
+                exporter.close()
 
             messagebox.showinfo("Export Successful", f"CSV results exported to {file_path}")
 
-    def flatten_dict(self, d: dict, parent_key: str = '', sep: str = '_') -> dict:
-        items = []
-        for k, v in d.items():
-            new_key = f"{parent_key}{sep}{k}" if parent_key else k
-            if isinstance(v, dict):
-                items.extend(self.flatten_dict(v, new_key, sep=sep).items())
-            else:
-                items.append((new_key, v))
-        return dict(items)
-
     def __del__(self):
-        self.temp_file.close()
-        os.unlink(self.temp_file.name)
+        # Job files are kept on purpose so an interrupted batch can be resumed
+        if self.job is not None:
+            self.job.close()
+        self.cache.close()
+        self.page_store.close()
@@ -0,0 +1,33 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# Query parameters that only track where a visitor came from
+TRACKING_PARAMS = {"gclid", "dclid", "fbclid", "msclkid", "yclid", "mc_cid", "mc_eid",
+                   "_ga", "_gl", "igshid"}
+
+def get_host(url: str) -> str:
+    parsed = urlsplit(url if "://" in url else f"http://{url}")
+    return (parsed.hostname or url).lower()
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for use as a cache key.
+
+    Aliases of the same page map to the same key: host case, default ports,
+    a leading "www.", trailing slashes, fragments, query parameter order and
+    tracking parameters (utm_* and friends) are all ignored.
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = f"http://{url}"
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+              if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS]
+    query = urlencode(sorted(params))
+    return urlunsplit((scheme, host, path, query, ""))